@@ -18,14 +18,17 @@
 
 
 import asyncio
+import hashlib
 import time
 import traceback
 import random
+from collections import OrderedDict
 from urllib.parse import urlparse
 
 import bittensor as bt
 import httpx
 import numpy as np
+import orjson
 from dotenv import load_dotenv
 from openai import AsyncOpenAI
 
@@ -35,6 +38,24 @@ from eastworld.validator.models import EWApiResponse, EWContext, EWObservation
 from eastworld.utils.uids import check_uid_availability
 
 
+def _loads(r: httpx.Response):
+    """Decodes a JSON response with orjson, or the stdlib parser for NaN literals."""
+    try:
+        return orjson.loads(r.content)
+    except orjson.JSONDecodeError:
+        return r.json()
+
+
+def _fmt_rows(rows: list[tuple[str, ...]]) -> str:
+    """Formats observation rows as a bullet list for the perception prompt."""
+    return "\n".join(f"    - {', '.join(r)}" for r in rows) or "    N/A"
+
+
+def _fmt_desc_rows(rows: list[tuple[str, ...]]) -> str:
+    """Formats observation rows whose last field is a description on its own line."""
+    return "\n".join(f"    - {', '.join(r[:-1])}\n{r[-1]}" for r in rows) or "    N/A"
+
+
 class Validator(BaseValidatorNeuron):
     """
     This class inherits from the BaseValidatorNeuron class, which in turn inherits from BaseNeuron. The BaseNeuron class takes care of routine tasks such as setting up wallet, subtensor, metagraph, logging directory, parsing config, etc. You can override any of the methods in BaseNeuron if you need to customize the behavior.
@@ -45,21 +66,84 @@ class Validator(BaseValidatorNeuron):
     http_client: httpx.AsyncClient
     inactive_miners: dict
 
+    # Reuse a signed auth header for a few seconds instead of signing every request.
+    _auth_bucket_seconds: int = 5
+    # Perception summaries are reused for identical prompts within the TTL.
+    _perception_cache_ttl: float = 60.0
+    _perception_cache_size: int = 256
+
     def __init__(self, config=None):
+        # UID availability only changes when the metagraph is resynced. Set before the
+        # base init, which may already call resync_metagraph() through sync().
+        self._uid_availability: dict[int, bool] = {}
+
         super(Validator, self).__init__(config=config)
 
         bt.logging.info("load_state()")
         self.load_state()
 
-        self.http_client = httpx.AsyncClient()
+        with open("eastworld/validator/prompts/perception.txt", "r") as f:
+            self._perception_tpl = f.read()
+
+        endpoint_url = urlparse(self.config.eastworld.endpoint_url)
+        self.http_client = httpx.AsyncClient(
+            base_url=f"{endpoint_url.scheme}://{endpoint_url.netloc}",
+            http2=True,
+            limits=httpx.Limits(
+                max_keepalive_connections=32, max_connections=64, keepalive_expiry=60.0
+            ),
+            timeout=httpx.Timeout(30.0, connect=5.0),
+        )
         self.inactive_miners = {}
+        # Inactive miners are only skipped on test and local networks.
+        self._is_devnet = self.config.subtensor.network in ("test", "local")
+        self._auth_cache: tuple[int, httpx.BasicAuth] | None = None
+
+        # Persistent LLM client, keeps connections to the LLM provider alive between turns.
+        self._llm_http = httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=10, max_connections=20),
+            http2=True,
+        )
+        self._llm = AsyncOpenAI(http_client=self._llm_http, timeout=10)
+        self._perception_cache: OrderedDict[bytes, tuple[float, str]] = OrderedDict()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super().__exit__(exc_type, exc_value, traceback)
+        if self.thread and self.thread.is_alive():
+            # The event loop is still owned by the background thread.
+            return
+        self.loop.run_until_complete(self.http_client.aclose())
+        self.loop.run_until_complete(self._llm_http.aclose())
+
+    def resync_metagraph(self):
+        super().resync_metagraph()
+        self._uid_availability.clear()
+
+    def _check_uid_availability(self, uid: int) -> bool:
+        """Cached check_uid_availability for the current metagraph."""
+        available = self._uid_availability.get(uid)
+        if available is None:
+            available = check_uid_availability(
+                self.metagraph, uid, self.config.neuron.vpermit_tao_limit
+            )
+            self._uid_availability[uid] = available
+        return available
 
     async def concurrent_forward(self):
         coroutines = [
             self.forward() for _ in range(self.config.neuron.num_concurrent_forwards)
         ]
-        await asyncio.gather(*coroutines)
-        await self.fetch_and_update_scores()
+        # Score fetching doesn't depend on miner responses, run it alongside the forwards.
+        results = await asyncio.gather(
+            *coroutines, self.fetch_and_update_scores(), return_exceptions=True
+        )
+        # Log failures individually so one failing task doesn't hide the others.
+        *forward_results, score_result = results
+        for i, r in enumerate(forward_results):
+            if isinstance(r, BaseException):
+                bt.logging.error(f"Forward #{i} failed: {r!r}")
+        if isinstance(score_result, BaseException):
+            bt.logging.error(f"Failed to fetch and update scores: {score_result!r}")
 
     async def forward(self):
         """
@@ -92,25 +176,22 @@ class Validator(BaseValidatorNeuron):
                 return
 
             # Validate the UID and hotkey from the API.
-            uid_is_available = check_uid_availability(
-                self.metagraph, res.uid, self.config.neuron.vpermit_tao_limit
-            )
-            bt.logging.debug(
-                f"UID {res.uid} {self.metagraph.axons[res.uid].hotkey} {uid_is_available}"
-            )
+            axon = self.metagraph.axons[res.uid]
+            uid_is_available = self._check_uid_availability(res.uid)
+            bt.logging.debug(f"UID {res.uid} {axon.hotkey} {uid_is_available}")
             if not uid_is_available:
                 bt.logging.info(f"UID {res.uid} from API is not available for mining.")
                 await asyncio.sleep(1)
                 return
-            if res.key != self.metagraph.axons[res.uid].hotkey:
+            if res.key != axon.hotkey:
                 bt.logging.info(
-                    f"UID {res.uid} hotkey mismatch API:{res.key} Metagraph:{self.metagraph.axons[res.uid].hotkey}"
+                    f"UID {res.uid} hotkey mismatch API:{res.key} Metagraph:{axon.hotkey}"
                 )
                 await asyncio.sleep(5)
                 return
 
             # Skip the miner for a certain period if it is inactive.
-            if self.config.subtensor.network in ("test", "local"):
+            if self._is_devnet:
                 notuntil, interval = self.inactive_miners.get(res.uid, (0, 0))
                 if notuntil and notuntil > time.time():
                     bt.logging.info(f"Skip for inactive miner #{res.uid}.")
@@ -120,16 +201,14 @@ class Validator(BaseValidatorNeuron):
                 bt.logging.error(f"No context from Eastworld API.")
                 return
 
-            axon = self.metagraph.axons[res.uid]
             bt.logging.info(f"Selected miner UID {res.uid} AXON {axon.ip}:{axon.port}")
-            miner_uids = np.array([res.uid])
             synapse = await self.create_synapse(res.context)
 
             # The dendrite client queries the network.
             timeout = self.config.neuron.timeout
             responses = await self.dendrite(
                 # Send the query to selected miner axons in the network.
-                axons=[self.metagraph.axons[uid] for uid in miner_uids],
+                axons=[axon],
                 synapse=synapse,
                 deserialize=False,
                 timeout=timeout,
@@ -140,7 +219,7 @@ class Validator(BaseValidatorNeuron):
 
             synapse: Observation = responses[0]
             # Add skip time for inactive miners.
-            if self.config.subtensor.network in ("test", "local"):
+            if self._is_devnet:
                 if synapse.is_failure or not len(synapse.action):
                     notuntil, interval = self.inactive_miners.get(
                         res.uid, (time.time(), 60)
@@ -174,28 +253,32 @@ class Validator(BaseValidatorNeuron):
 
     def gen_http_auth(self) -> httpx.BasicAuth:
         """Generates the HTTP Basic Auth object for the Eastworld API with validator hotkey."""
-        keypair = self.wallet.hotkey
         timestamp = int(time.time())
+        bucket = timestamp // self._auth_bucket_seconds
+        if self._auth_cache and self._auth_cache[0] == bucket:
+            return self._auth_cache[1]
+
+        keypair = self.wallet.hotkey
         message = f"<Bytes>Eastworld AI {timestamp}</Bytes>"
         signature = keypair.sign(data=message)
 
-        return httpx.BasicAuth(
+        auth = httpx.BasicAuth(
             username=f"{keypair.ss58_address}|{timestamp}",
             password=signature.hex(),
         )
+        self._auth_cache = (bucket, auth)
+        return auth
 
     async def get_observation(self) -> EWApiResponse:
         """Fetches the observation data from the Eastworld API."""
-        endpoint_url = urlparse(self.config.eastworld.endpoint_url)
-        endpoint = f"{endpoint_url.scheme}://{endpoint_url.netloc}/sn/env"
-        req = self.http_client.build_request("GET", endpoint)
+        req = self.http_client.build_request("GET", "/sn/env")
         r = await self.http_client.send(req, auth=self.gen_http_auth())
         if r.status_code != 200:
             raise Exception(
                 f"Failed to get observation from Eastworld. {r.status_code}"
             )
 
-        ob_data = r.json()
+        ob_data = _loads(r)
         try:
             response = EWApiResponse.model_validate(ob_data)
             return response
@@ -204,10 +287,11 @@ class Validator(BaseValidatorNeuron):
             raise
 
     async def submit_action(self, turns: int, uid: int, synapse: Observation):
-        """ """
-        endpoint_url = urlparse(self.config.eastworld.endpoint_url)
-        endpoint = f"{endpoint_url.scheme}://{endpoint_url.netloc}/sn/step"
+        """Submits the miner's action to the Eastworld API.
 
+        Actions are posted one per request. Concurrent forwards share the HTTP/2
+        connection of `http_client` and the cached auth signature.
+        """
         for act in synapse.action:
             if not isinstance(act, dict):
                 bt.logging.warning("Synapse Observation.action item is not a dict")
@@ -219,14 +303,25 @@ class Validator(BaseValidatorNeuron):
             "key": synapse.axon.hotkey,
             "action": synapse.action,
         }
-        req = self.http_client.build_request("POST", endpoint, json=data)
+        # orjson encodes NaN/Infinity in miner actions as null, the server validates the action.
+        try:
+            req = self.http_client.build_request(
+                "POST",
+                "/sn/step",
+                content=orjson.dumps(data),
+                headers={"content-type": "application/json"},
+            )
+        except orjson.JSONEncodeError:
+            # orjson rejects >64-bit integers and non-str keys from miner actions,
+            # fall back to the lenient stdlib encoder and let the server validate.
+            req = self.http_client.build_request("POST", "/sn/step", json=data)
 
         r = await self.http_client.send(req, auth=self.gen_http_auth())
         if r.status_code > 499:
             raise Exception(
                 f"Failed to submit action ({uid}) to Eastworld server. {r.status_code}"
             )
-        ob = r.json()
+        ob = _loads(r)
         if ob.get("code") != 200 and ob.get("code") != 400:
             raise Exception(
                 f"Failed to submit action ({uid}) to Eastworld server. {ob.get('code')} {ob.get('message')}"
@@ -242,50 +337,50 @@ class Validator(BaseValidatorNeuron):
             environment="", objects="", interactions=context.interaction
         )
 
-        # Summarize perception with LLM
+        # Summarize perception with LLM. Skip it when there is nothing to describe.
         perception_prompt = ""
-        with open("eastworld/validator/prompts/perception.txt", "r") as f:
-            prompt_tpl = f.read()
+        if any(
+            (ob.terrain, ob.weather, ob.location, ob.structure, ob.static, ob.dynamic)
+        ):
             perception_context = {
-                "terrain": "\n".join([f"    - {', '.join(x)}" for x in ob.terrain])
-                or "    N/A",
-                "weather": "\n".join([f"    - {', '.join(x)}" for x in ob.weather])
-                or "    N/A",
-                "location": "\n".join([f"    - {', '.join(x)}" for x in ob.location])
-                or "    N/A",
-                "structure": "\n".join(
-                    [f"    - {', '.join(x[:-1])}\n{x[-1]}" for x in ob.structure]
-                )
-                or "    N/A",
-                "static_object": "\n".join(
-                    [f"    - {', '.join(x[:-1])}\n{x[-1]}" for x in ob.static]
-                )
-                or "    N/A",
-                "dynamic_object": "\n".join(
-                    [f"    - {', '.join(x[:-1])}\n{x[-1]}" for x in ob.dynamic]
-                )
-                or "    N/A",
+                "terrain": _fmt_rows(ob.terrain),
+                "weather": _fmt_rows(ob.weather),
+                "location": _fmt_rows(ob.location),
+                "structure": _fmt_desc_rows(ob.structure),
+                "static_object": _fmt_desc_rows(ob.static),
+                "dynamic_object": _fmt_desc_rows(ob.dynamic),
             }
-            perception_prompt = prompt_tpl.format(**perception_context)
+            perception_prompt = self._perception_tpl.format(**perception_context)
 
         async def get_llm_response(prompt):
             if not prompt:
                 return ""
-            async with httpx.AsyncClient() as client:
-                llm = AsyncOpenAI(http_client=client, timeout=10)
-                llm_model = self.config.eastworld.llm_model
-                llm_args = {
-                    "model": llm_model,
-                    "messages": [{"role": "user", "content": prompt}],
-                }
-                if llm_model.startswith("gpt-5") or llm_model.startswith("gemini-2.5"):
-                    llm_args["reasoning_effort"] = "low"
-                response = await llm.chat.completions.create(**llm_args)
-                content = ""
-                if response.choices[0].message.content:
-                    content = response.choices[0].message.content.strip()
-                bt.logging.trace(f"LLM response in perception: \n{content}")
-                return content
+
+            key = hashlib.blake2b(prompt.encode(), digest_size=16).digest()
+            cached = self._perception_cache.get(key)
+            if cached and time.time() - cached[0] < self._perception_cache_ttl:
+                self._perception_cache.move_to_end(key)
+                bt.logging.trace("LLM response in perception from cache")
+                return cached[1]
+
+            llm_model = self.config.eastworld.llm_model
+            llm_args = {
+                "model": llm_model,
+                "messages": [{"role": "user", "content": prompt}],
+            }
+            if llm_model.startswith("gpt-5") or llm_model.startswith("gemini-2.5"):
+                llm_args["reasoning_effort"] = "low"
+            response = await self._llm.chat.completions.create(**llm_args)
+            content = ""
+            if response.choices[0].message.content:
+                content = response.choices[0].message.content.strip()
+            bt.logging.trace(f"LLM response in perception: \n{content}")
+
+            self._perception_cache[key] = (time.time(), content)
+            self._perception_cache.move_to_end(key)
+            if len(self._perception_cache) > self._perception_cache_size:
+                self._perception_cache.popitem(last=False)
+            return content
 
         perception_content = await get_llm_response(perception_prompt)
         environment_content, objects_content = self._parse_perception_content(
@@ -314,89 +409,76 @@ class Validator(BaseValidatorNeuron):
         return synapse
 
     def _parse_perception_content(self, content: str) -> tuple[str, str]:
-        lines = [line.strip() for line in content.splitlines() if line.strip()]
-        header_indices = []
-        for i, line in enumerate(lines):
+        # Lines before the first header, between the first two headers, and after the second.
+        sections = [[]]
+        for line in content.splitlines():
+            line = line.strip()
+            if not line:
+                continue
             if line.startswith("#"):
-                header_indices.append(i)
+                if len(sections) < 3:
+                    sections.append([])
+                continue
+            sections[-1].append(line)
 
-        environment_lines = []
-        objects_lines = []
-        if not header_indices and lines:
+        if len(sections) == 1:
             # If no headers are found, assume the first line is environment and the rest are objects.
-            environment_lines = lines[:1]
-            objects_lines = lines[1:]
-        elif len(header_indices) == 1:
+            environment_lines = sections[0][:1]
+            objects_lines = sections[0][1:]
+        elif len(sections) == 2:
             # If only one header is found, assume it's the start of the objects section.
-            environment_lines = lines[: header_indices[0]]
-            objects_lines = lines[header_indices[0] + 1 :]
+            environment_lines, objects_lines = sections
         else:
             # If two or more headers are found, use the first two to split the content.
-            environment_lines = lines[: header_indices[1]]
-            objects_lines = lines[header_indices[1] + 1 :]
-
-        environment_content = "\n".join(
-            [line for line in environment_lines if not line.startswith("#")]
-        )
-        objects_content = "\n".join(
-            [line for line in objects_lines if not line.startswith("#")]
-        )
+            environment_lines = sections[0] + sections[1]
+            objects_lines = sections[2]
 
-        return environment_content, objects_content
+        return "\n".join(environment_lines), "\n".join(objects_lines)
 
     async def fetch_and_update_scores(self):
         """Fetch latest miners' scores from Eastworld server"""
-        endpoint_url = urlparse(self.config.eastworld.endpoint_url)
-        endpoint = f"{endpoint_url.scheme}://{endpoint_url.netloc}/sn/score"
-
-        req = self.http_client.build_request("GET", endpoint)
+        req = self.http_client.build_request("GET", "/sn/score")
         r = await self.http_client.send(req, auth=self.gen_http_auth())
         if r.status_code != 200:
             raise Exception(
                 f"Failed to get miner scores from Eastworld. {r.status_code} {r.text}"
             )
 
-        data = r.json()
-        uids = [d["uid"] for d in data["scores"]]
-        new_scores = [d["score"] for d in data["scores"]]
+        data = _loads(r)
+        n = len(data["scores"])
+        uids_array = np.empty(n, dtype=np.int64)
+        new_scores = np.empty(n, dtype=self.scores.dtype)
+        for i, d in enumerate(data["scores"]):
+            uids_array[i] = d["uid"]
+            new_scores[i] = d["score"]
 
         # Check if rewards contains NaN values.
         if np.isnan(new_scores).any():
             bt.logging.warning(f"NaN values detected in rewards: {new_scores}")
             # Replace any NaN values in scores with 0.
-            new_scores = np.nan_to_num(new_scores, nan=0)
+            np.nan_to_num(new_scores, copy=False, nan=0)
 
-        # Ensure new_scores is a numpy array.
-        new_scores = np.asarray(new_scores)
-        uids_array = np.array(uids)
-
-        # Handle edge case: If either new_scores or uids_array is empty.
-        if new_scores.size == 0 or uids_array.size == 0:
-            bt.logging.info(f"new_scores: {new_scores}, uids_array: {uids_array}")
+        # Handle edge case: If the API returns no scores.
+        if n == 0:
             bt.logging.warning(
-                "Either new_scores or uids_array is empty. No updates will be performed."
+                "No scores from Eastworld API. No updates will be performed."
             )
             return
 
-        # Check if sizes of new_scores and uids_array match.
-        if new_scores.size != uids_array.size:
-            raise ValueError(
-                f"Shape mismatch: new_scores array of shape {new_scores.shape} "
-                f"cannot be broadcast to uids array of shape {uids_array.shape}"
-            )
-
         # Compute forward pass rewards, assumes uids are mutually exclusive.
         # If things work as expected, scores from Eastworld API should be same size as metagraph.
         # Exception case:
         #   The server synchronizes the network before the validator and increases the UIDs (metagraph.n). The
         #   code will raise an IndexError error. It won't happen if UID number reaches 256.
-        # shape: [ metagraph.n ]
-        scattered_scores: np.ndarray = np.zeros_like(self.scores)
-        scattered_scores[uids_array] = new_scores
+        if uids_array.max() >= self.scores.size:
+            raise IndexError(
+                f"UID {uids_array.max()} out of bounds for scores of size {self.scores.size}"
+            )
 
-        # Update local scores.
+        # Update local scores in place.
         # shape: [ metagraph.n ]
-        self.scores: np.ndarray = scattered_scores
+        self.scores.fill(0)
+        self.scores[uids_array] = new_scores
         bt.logging.debug(f"Updated scores: \n{self.scores}")
 
 